@@ -15,33 +15,77 @@
     You should have received a copy of the GNU Affero General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
-from collections import defaultdict
+from array import array
+from collections import deque
+from functools import lru_cache
+from itertools import count
 from os import getenv
+import re
 from typing import Iterator
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Oracle graphs are rendered on construction by default if DEBUG is set at import time
+_DEBUG = bool(getenv("DEBUG"))
+
+# Limits within which a scan function specialised to the oracle is generated
+CODEGEN_MAX_STATES = 1000
+CODEGEN_MAX_PREFIX = 64
+
+# Documents are translated to oracle columns, and scanned, in tiles of this many bytes
+TILE_LENGTH = 1 << 16
+
+# Tiles in which at least this fraction of bytes occur in no term prefix are
+# scanned only within their runs of bytes that do
+SPARSE_TILE_MISSING = 7 / 8
+
+# Limits within which Hyperscan's packed (Teddy) literal matcher is used
+PACKED_MAX_TERMS = 8
+PACKED_MAX_PREFIX = 8
+
 
 class TrieNode:
-    counter = 0
+    __slots__ = ("parent", "char", "children", "terms", "id")
+    _ids = count()
 
     def __init__(self, parent=None, char=None, children=None, terms=None):
         self.parent = parent
         self.char = char
         self.children = children or {}
-        self.terms = frozenset(terms or [])
+        self.terms = set(terms or [])
         self.allocate_id()
+        if children:
+            self._rehome_children()
 
+    def _rehome_children(self):
+        # Adopt child nodes that were constructed independently of this node
         for child_char, child in self.children.items():
             child.parent = self
             child.char = child_char
 
     def __eq__(self, other):
-        assert isinstance(other, TrieNode)
-        term_equality = self.terms == other.terms
-        pairs = zip(self.children, other.children, strict=True)
-        try:
-            pair_equality = all(a == b for a, b in pairs)
-        except ValueError:
+        if not isinstance(other, TrieNode):
+            return NotImplemented
+        if len(self.children) != len(other.children):
             return False
+        term_equality = self.terms == other.terms
+        pair_equality = all(
+            child_char in other and child == other[child_char]
+            for child_char, child in self.children.items()
+        )
         char_equality = self.char == other.char
         return term_equality and pair_equality and char_equality
 
@@ -52,37 +96,139 @@ class TrieNode:
         return self.children[child_char]
 
     def __iter__(self) -> Iterator["TrieNode"]:
-        nodes = [self]
+        nodes = deque([self])
         while nodes:
-            node = nodes.pop(0)
+            node = nodes.popleft()
             yield node
             nodes.extend(node.children.values())
 
     def add_child(self, child_node, child_char):
-        assert child_char not in self.children
         self.children[child_char] = child_node
 
     def add_term(self, term):
-        self.terms = frozenset(self.terms | {term})
+        self.terms.add(term)
 
     def allocate_id(self):
-        self.id, TrieNode.counter = TrieNode.counter, TrieNode.counter + 1
+        self.id = next(TrieNode._ids)
 
     @staticmethod
     def from_terms(terms: set[str], prefix_length: int) -> "TrieNode":
         root = TrieNode()
         for term in terms:
             node = root
-            for char in term[:prefix_length][::-1]:  # reversed prefixes
-                if char in node:
-                    node = node[char]
-                else:
-                    node = TrieNode(parent=node, char=char)
-                    node.parent.add_child(node, char)
+            # Walk the reversed prefix of the term
+            for index in range(min(prefix_length, len(term)) - 1, -1, -1):
+                char = term[index]
+                child = node.children.get(char)
+                if child is None:
+                    child = TrieNode(parent=node, char=char)
+                    node.add_child(child, char)
+                node = child
             node.add_term(term)
         return root
 
 
+def _scan(columns, position, prefix_length, stride, transitions, skip):
+    """
+    Slide the search window across a document until a window leads the oracle
+    to a terminal state.  The document is provided as the sequence of oracle
+    alphabet columns that its UTF-8 encoded bytes map onto.
+
+    The oracle is represented by integer arrays only, as a flat table holding
+    one row of `stride` entries per state: the transition from the state whose
+    row begins at offset `r` on a byte in column `c` is the entry
+    `transitions[r + c]`.  Each entry packs the row offset of the
+    resulting state together with its terminal flag, as `row << 1 | terminal`,
+    and missing transitions are -1.  This keeps the function compilable by
+    Numba.
+
+    When a character of the window fails to match, the next window begins just
+    after it -- a whole window further on if that was the final character.
+    Once a window has been read in full, the next window is aligned using the
+    Horspool `skip` table, indexed by the final column of the current window.
+
+    Returns a tuple of the document position at which to verify the terms of
+    the matched state, the matched state (or -1 when the document has been
+    exhausted), and the position from which to resume the scan.
+    """
+    n = len(columns)
+    while position + prefix_length <= n:
+
+        # Read backwards through the window, and correspondingly down the oracle
+        row, advance = 0, prefix_length
+        while advance:
+            target = transitions[row + columns[position + advance - 1]]
+            advance -= 1
+            if target < 0:
+                break
+            row = target >> 1
+            if target & 1:
+                # Advance to the furthest successfully-matched character in the window
+                shift = advance or skip[columns[position + prefix_length - 1]]
+                return position + advance, row // stride, position + shift
+
+        # No term can begin at or before the character that failed to match;
+        # a window that was read in full is realigned by the skip table instead
+        if advance:
+            position += advance + 1
+        else:
+            position += skip[columns[position + prefix_length - 1]]
+
+    return position, -1, position
+
+
+def _matches(encoded, position, term_data, start, end):
+    if position + end - start > len(encoded):
+        return False
+    for offset in range(end - start):
+        if encoded[position + offset] != term_data[start + offset]:
+            return False
+    return True
+
+
+def _scan_verify(
+    columns, encoded, prefix_length, stride, transitions, skip,
+    candidates, candidate_terms, term_data, term_offsets, found,
+):
+    """
+    Scan a document for every query term, verifying candidate matches against
+    its UTF-8 encoded bytes as they are found, so that the complete search can
+    run as compiled code.
+
+    Term `t` occupies `term_data[term_offsets[t]:term_offsets[t + 1]]`, and the
+    terms to verify after reaching state `s` are the entries of
+    `candidate_terms[candidates[s]:candidates[s + 1]]`.  Terms are flagged in
+    `found` as they are matched; returns whether all of them have been.
+    """
+    remaining = len(found)
+    for term in range(len(found)):
+        remaining -= found[term]
+
+    position = 0
+    while remaining:
+        position, state, resume = _scan(
+            columns, position, prefix_length, stride, transitions, skip
+        )
+        if state < 0:
+            break
+
+        for candidate in range(candidates[state], candidates[state + 1]):
+            term = candidate_terms[candidate]
+            start, end = term_offsets[term], term_offsets[term + 1]
+            if not found[term] and _matches(encoded, position, term_data, start, end):
+                found[term] = 1
+                remaining -= 1
+        position = resume
+
+    return remaining == 0
+
+
+if njit:
+    _scan = njit(cache=True)(_scan)
+    _matches = njit(cache=True)(_matches)
+    _scan_verify = njit(cache=True)(_scan_verify)
+
+
 class FactorOracle:
     """
     This class will implement a Set Backwards Oracle Matching (SBOM) factor
@@ -96,10 +242,14 @@ class FactorOracle:
     reduce the number of comparison steps -- but the window can be no larger
     than the shortest of the search patterns.
 
-    At the start of the document, and in cases where we know that no pattern
-    can possibly match the latest-read character, we can advance the window
-    by its complete length.  In other cases we proceed one character at a
-    time.
+    Each window is read backwards, from its final character.  When a character
+    leads to no transition, no pattern can occur in a window that contains it,
+    so the next window begins just after that character -- a whole window
+    further on if it was the final character.  Once a window has been read in
+    full, the next window is aligned using a Horspool skip table, indexed by
+    the window's final character.  Runs of characters that occur in no pattern
+    prefix cannot contain a match at all, and where those characters are
+    common in the document they are skipped without being read.
 
     So, if our patterns are "twelve", "mood", and "food", and we attempt a
     match of those patterns against a document "food products", we can begin by
@@ -132,97 +282,416 @@ class FactorOracle:
     Strings", by G Navarro and M Raffinot, 2002, Cambridge University Press.
     """
     @staticmethod
-    def _build_graph(root: TrieNode) -> dict[int, dict[str, TrieNode]]:
-        edges: dict[int, dict[str, TrieNode]] = defaultdict(dict)
-        destination_nodes: set[int] = set()
-        for node in root:
-            if node is root:
-                continue
-
-            # Always create a transition from the parent node to this one
-            parent = node.parent
-            edges[parent.id][node.char] = node
-
-            # Collect the path from the nearest node with inbound transitions to here
-            transitions = []
-            while parent is not root:
-                parent, char = parent.parent, parent.char
-                if parent.id:
-                    transitions.append(char)
-                if parent.id in destination_nodes:
-                    break
+    def _build_alphabet(terms: set[bytes], prefix_length: int) -> tuple[bytes, int]:
+        # Map the bytes of the term prefixes -- which label every transition --
+        # onto a dense alphabet of columns, with one further column, whose
+        # transitions always miss, for all other bytes; the mapping is a
+        # bytes.translate table, applied to whole documents
+        alphabet = sorted({char for term in terms for char in term[:prefix_length]})
+        columns = {char: column for column, char in enumerate(alphabet)}
+        remap = bytes(columns.get(char, len(alphabet)) for char in range(256))
+        return remap, len(alphabet) + 1
 
-            # Navigate from the root of the trie based on the collected path (if any)
-            placement: TrieNode = root
-            for char in transitions:
-                placement = edges[placement.id].get(char) or root
-                if placement is root:
+    @staticmethod
+    def _build_graph(
+        terms: set[bytes], prefix_length: int, remap: bytes, stride: int
+    ) -> tuple[list[list[int]], list[tuple[bytes, ...]]]:
+        # Insert the reversed prefix of each term into a trie of integer states,
+        # rooted at state zero, whose transitions are held in a list of `stride`
+        # columns per state (-1 where there is no transition).  Terms are
+        # inserted in order of their reversed prefixes, so that states are
+        # numbered in depth-first order and the successive states along each
+        # path -- the usual route during matching -- are adjacent in the table
+        children = [[-1] * stride]
+        parents, parent_columns = array("i", [-1]), bytearray(1)
+        depths = array("i", [0])
+        terminal_terms: list[list[bytes]] = [[]]
+        for term in sorted(terms, key=lambda term: term[prefix_length - 1::-1]):
+            state = 0
+            for index in range(min(prefix_length, len(term)) - 1, -1, -1):
+                column = remap[term[index]]
+                row = children[state]
+                if (child := row[column]) < 0:
+                    child = row[column] = len(children)
+                    children.append([-1] * stride)
+                    parents.append(state)
+                    parent_columns.append(column)
+                    depths.append(prefix_length - index)
+                    terminal_terms.append([])
+                state = child
+            terminal_terms[state].append(term)
+
+        # The supply function maps each state to the state that the oracle
+        # reaches by reading the longest suffix of that state's path which leads
+        # elsewhere -- much like an Aho-Corasick failure link.  It is undefined
+        # (-1) for the root, and is determined for each state from that of its
+        # parent; that requires shallower states to be complete, so unlike
+        # insertion it proceeds in breadth-first order
+        edges = [list(row) for row in children]
+        supply = array("i", [-1]) * len(edges)
+        for child in sorted(range(1, len(edges)), key=depths.__getitem__):
+            column = parent_columns[child]
+
+            # Add transitions to the child from each state along the parent's
+            # supply chain that lacks one for the current symbol
+            down = supply[parents[child]]
+            while down >= 0:
+                row = edges[down]
+                if row[column] >= 0:
                     break
+                row[column] = child
+                down = supply[down]
+            supply[child] = 0 if down < 0 else row[column]
 
-            # If we navigated to an available non-root node, add a transition from there
-            if placement is not root and node.char not in edges[placement.id]:
-                edges[placement.id][node.char] = node
-                destination_nodes.add(placement.id)
+        return edges, [tuple(state_terms) for state_terms in terminal_terms]
 
-            # If the root node is unaware of the current symbol, add a direct transition
-            if node.char not in edges[root.id]:
-                edges[root.id][node.char] = node
-                destination_nodes.add(node.id)
+    @staticmethod
+    def _compile_graph(
+        edges: list[list[int]], terminal_terms: list[tuple[bytes, ...]], stride: int
+    ) -> array:
+        # Flatten the transitions into a single table; premultiply each target
+        # state by the stride, to give the offset of its row, and flag terminal
+        # targets in the low bit
+        terminal = [bool(state_terms) for state_terms in terminal_terms]
+        return array("i", [
+            to_state * stride << 1 | terminal[to_state] if to_state >= 0 else -1
+            for row in edges for to_state in row
+        ])
 
-        return edges
+    @staticmethod
+    def _build_skip(
+        terms: set[bytes], prefix_length: int, remap: bytes, stride: int
+    ) -> array:
+        """
+        Build a Horspool shift table: for each alphabet column, the distance
+        from the end of the window to the rightmost occurrence of its byte
+        within the leading `prefix_length - 1` bytes of any term (or the full
+        window length if it does not occur there).
+        """
+        skip = array("i", [prefix_length]) * stride
+        for term in terms:
+            for index, char in enumerate(term[:prefix_length - 1]):
+                column = remap[char]
+                skip[column] = min(skip[column], prefix_length - 1 - index)
+        return skip
 
-    def __init__(self, query_terms: set[str]):
-        self._query_terms = query_terms
-        self._prefix_length = min(map(len, query_terms))
-        self._trie = TrieNode.from_terms(self._query_terms, self._prefix_length)
-        self._graph = FactorOracle._build_graph(self._trie)
-        self._export_graph()
+    @staticmethod
+    def _compile_terms(
+        terms: set[bytes], terminal_terms: list[tuple[bytes, ...]]
+    ) -> tuple[list[tuple[tuple[int, bytes], ...]], tuple[array, array, bytes, array]]:
+        # Number the terms, and list the (id, term) outputs of each state
+        ordered = sorted(terms)
+        term_ids = {term: term_id for term_id, term in enumerate(ordered)}
+        outputs = [
+            tuple((term_ids[term], term) for term in state_terms)
+            for state_terms in terminal_terms
+        ]
+
+        # Flatten the terms and per-state verification candidates into arrays
+        term_offsets = array("i", [0])
+        for term in ordered:
+            term_offsets.append(term_offsets[-1] + len(term))
+
+        candidates, candidate_terms = array("i", [0]), array("i")
+        for state_terms in terminal_terms:
+            candidate_terms.extend(term_ids[term] for term in state_terms)
+            candidates.append(len(candidate_terms))
+
+        return outputs, (candidates, candidate_terms, b"".join(ordered), term_offsets)
 
-    def _export_graph(self):
-        if not getenv("DEBUG"):
-            return
+    @staticmethod
+    def _build_follow_masks(
+        terminal_terms: list[tuple[bytes, ...]], prefix_length: int
+    ) -> list[int]:
+        """
+        Build a filter for each state over the byte that follows a window in
+        the document (or 256, at the end of the document): bit `b` is set if
+        a term of the state continues with byte `b` after its prefix, and all
+        bits are set if a term of the state consists of its prefix alone.
+        """
+        masks = []
+        for state_terms in terminal_terms:
+            mask = 0
+            for term in state_terms:
+                mask |= 1 << term[prefix_length] if len(term) > prefix_length else ~0
+            masks.append(mask)
+        return masks
+
+    def __init__(self, query_terms: set[str], debug: bool = _DEBUG):
+        # The oracle operates on the UTF-8 encoded bytes of terms and documents;
+        # empty terms occur in every document, so they need no searching for
+        self._query_terms = {
+            term.encode("utf-8", "surrogatepass") for term in query_terms if term
+        }
+        self._prefix_length = min(map(len, self._query_terms), default=0)
+        self._remap, stride = FactorOracle._build_alphabet(
+            self._query_terms, self._prefix_length
+        )
+        self._graph, terminal_terms = FactorOracle._build_graph(
+            self._query_terms, self._prefix_length, self._remap, stride
+        )
+        table = FactorOracle._compile_graph(self._graph, terminal_terms, stride)
+        skip = FactorOracle._build_skip(
+            self._query_terms, self._prefix_length, self._remap, stride
+        )
+        self._tables = (stride, table, skip)
+        # Only the terms whose prefixes lead to a terminal state need verifying
+        # there; terminal_terms is indexed by state, and empty for non-terminals
+        self._outputs, self._verification = FactorOracle._compile_terms(
+            self._query_terms, terminal_terms
+        )
+        self._follow_masks = FactorOracle._build_follow_masks(
+            terminal_terms, self._prefix_length
+        )
+
+        # Bytes that occur in no term prefix all translate to the final column
+        self._missing = bytes([stride - 1])
+        runs = b"[^" + re.escape(self._missing) + b"]{%d,}" % self._prefix_length
+        self._runs = re.compile(runs).finditer
+
+        self._scan = self._select_scan()
+        if debug:
+            self.export_graph()
+
+    def _select_scan(self):
+        stride, table, _ = self._tables
+        states = len(table) // stride
+        if not njit and states <= CODEGEN_MAX_STATES:
+            if 0 < self._prefix_length <= CODEGEN_MAX_PREFIX:
+                return self._codegen_scan()
+
+        def scan(columns, position):
+            return _scan(columns, position, self._prefix_length, *self._tables)
+        return scan
+
+    def _codegen_scan(self):
+        """
+        Generate a Python equivalent of `_scan` that is specialised to this
+        oracle: the reads of each window are unrolled, with constant offsets,
+        and every transition is resolved by a single lookup in a dictionary
+        keyed by `state << 8 | column`.  Dictionary values are either the next
+        state, pre-shifted to form its part of the following key, or -- for
+        terminal states -- the negative value `-2 - state`; -1 means a miss.
+        """
+        stride, table, skip = self._tables
+        transitions = {}
+        for row in range(0, len(table), stride):
+            for column in range(stride - 1):
+                if (target := table[row + column]) >= 0:
+                    following, terminal = (target >> 1) // stride, target & 1
+                    key = row // stride << 8 | column
+                    transitions[key] = -2 - following if terminal else following << 8
+
+        window = self._prefix_length
+        shift = f"skip[columns[position + {window - 1}]]"
+        source = [
+            "def scan(columns, position):",
+            f"    end = len(columns) - {window}",
+            "    while position <= end:",
+        ]
+        for index in range(window - 1, -1, -1):
+            key = f"columns[position + {index}]"
+            if index < window - 1:
+                key = f"target | {key}"
+            source += [
+                f"        target = get({key}, -1)",
+                "        if target < 0:",
+                "            if target == -1:",
+                f"                position += {index + 1 if index else shift}",
+                "                continue",
+                f"            return position + {index}, -2 - target,"
+                f" position + {index or shift}",
+            ]
+        source += [
+            f"        position += {shift}",
+            "    return position, -1, position",
+        ]
+
+        namespace = {"get": transitions.get, "skip": skip}
+        exec(compile("\n".join(source), "<sbom>", "exec"), namespace)
+        return namespace["scan"]
+
+    def export_graph(self, path: str = "testing.png"):
         import graphviz
         dot = graphviz.Digraph()
-        for node_id, transitions in self._graph.items():
-            dot.node(str(node_id))
-            for char, to_node in transitions.items():
-                dot.edge(str(node_id), str(to_node.id), label=char)
-        dot.render(outfile="testing.png")
-
-    def search(self, document):
-        remaining = set(self._query_terms)
-        while (window := document[:self._prefix_length]) and remaining:
-
-            # Optimization: no results can be found in a window smaller than the prefix
-            if len(window) < self._prefix_length:
-                break
-
-            # Read backwards through the window, and correspondingly down the trie
-            state, advance = self._trie, self._prefix_length
-            for char in reversed(window):
-                state, advance = self._graph[state.id].get(char), advance - 1
-                if state is None or state.terms:
+        stride = self._tables[0]
+        alphabet = sorted(range(256), key=self._remap.__getitem__)[:stride - 1]
+        for state, row in enumerate(self._graph):
+            dot.node(str(state))
+            for column, to_state in enumerate(row):
+                if to_state >= 0:
+                    dot.edge(str(state), str(to_state), label=chr(alphabet[column]))
+        dot.render(outfile=path)
+
+    def _regions(self, encoded: bytes) -> Iterator[tuple[int, bytes]]:
+        """
+        Translate an encoded document to alphabet columns tile by tile, so that
+        a document need not be translated beyond the point at which all of the
+        terms have been found, and yield the offset and columns of each region
+        to scan.  Tiles overlap by one byte less than the window length, so
+        that every window lies within one of them.
+        """
+        window = self._prefix_length
+        for start in range(0, max(len(encoded) - window + 1, 1), TILE_LENGTH):
+            tile = encoded[start:start + TILE_LENGTH + window - 1]
+            columns = tile.translate(self._remap)
+
+            # Every window that can match lies within a run of bytes that occur
+            # in term prefixes; where those are sparse, find the runs using the
+            # regular expression engine and scan only them, not every window
+            missing = columns.count(self._missing)
+            if missing == len(columns):
+                continue
+            if missing < len(columns) * SPARSE_TILE_MISSING:
+                yield start, columns
+                continue
+            for run in self._runs(columns):
+                yield start + run.start(), columns[run.start():run.end()]
+
+    def search(self, document: str | bytes):
+        remaining = set(range(len(self._query_terms)))
+        if not self._prefix_length:
+            return len(remaining) == 0
+
+        # Documents that are already UTF-8 encoded are scanned without copying
+        if isinstance(document, bytes):
+            encoded = document
+        else:
+            encoded = document.encode("utf-8", "surrogatepass")
+
+        # A single term is found faster by the substring search of bytes itself
+        if len(remaining) == 1:
+            (term,) = self._query_terms
+            return term in encoded
+
+        # With Numba available, verify candidate matches in compiled code too
+        if njit:
+            columns = encoded.translate(self._remap)
+            found = bytearray(len(self._query_terms))
+            return _scan_verify(
+                columns, encoded, self._prefix_length,
+                *self._tables, *self._verification, found,
+            )
+
+        # Per-oracle values are bound locally for the loop, as in _codegen_scan
+        scan, window = self._scan, self._prefix_length
+        masks, outputs = self._follow_masks, self._outputs
+        end = len(encoded) - window
+        for start, region in self._regions(encoded):
+            position = 0
+            while remaining:
+                position, state, resume = scan(region, position)
+                if state < 0:
                     break
-            assert advance >= 0
-
-            # Advance to the furthest successfully-matched character in the window
-            document = document[advance:]
 
-            # Remove any terms associated with a matched state node
-            if state and state.terms:
-                remaining -= {term for term in state.terms if document.startswith(term)}
-
-            if advance == 0:
-                document = document[1:]
+                # Skip verification if no term of the state continues with the
+                # byte that follows the window
+                offset = start + position
+                follow = encoded[offset + window] if offset < end else 256
+                if masks[state] >> follow & 1:
+                    # Remove any terms associated with a matched state node
+                    for term_id, term in outputs[state]:
+                        if term_id in remaining and encoded.startswith(term, offset):
+                            remaining.discard(term_id)
+                            if not remaining:
+                                return True
+                position = resume
 
         # Return success if all query terms have been found
         return len(remaining) == 0
 
 
 def search_naive(document: str, terms: set[str]) -> bool:
-    return all(term in document for term in terms)
+    # Longer terms are less likely to occur, so try those first
+    return all(map(document.__contains__, sorted(terms, key=len, reverse=True)))
+
+
+@lru_cache(maxsize=128)
+def _automaton(terms: frozenset[str]) -> "ahocorasick.Automaton":
+    automaton = ahocorasick.Automaton()
+    for term in terms:
+        automaton.add_word(term, term)
+    automaton.make_automaton()
+    return automaton
+
+
+def search_ahocorasick(document: str, terms: set[str]) -> bool:
+    """
+    Search using the Aho-Corasick automaton provided by the pyahocorasick C
+    extension; this is the recommended implementation for production use.
+    """
+    # Empty terms occur in every document, and cannot be added to an automaton
+    terms = frozenset(term for term in terms if term)
+    if not terms:
+        return True
+    automaton = _automaton(terms)
+
+    remaining = set(terms)
+    for _, term in automaton.iter(document):
+        remaining.discard(term)
+        if not remaining:
+            return True
+    return not remaining
+
+
+@lru_cache(maxsize=128)
+def _database(terms: frozenset[str]) -> "hyperscan.Database":
+    patterns = [term.encode("utf-8", "surrogatepass") for term in terms]
+    database = hyperscan.Database()
+    database.compile(
+        expressions=patterns,
+        ids=list(range(len(patterns))),
+        elements=len(patterns),
+        flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(patterns),
+        literal=True,
+    )
+    return database
+
+
+def search_hyperscan(document: str, terms: set[str]) -> bool:
+    """
+    Search using an Intel Hyperscan literal-set database (this requires the
+    optional hyperscan package).
+
+    Small sets of short literals are handled by Hyperscan's "Teddy" matcher,
+    which looks up the nibbles of each block of input bytes in per-pattern
+    bucket tables to produce candidate offsets, and only then verifies those
+    candidates against the complete patterns.
+    """
+    # Empty terms occur in every document, and cannot be compiled as literals
+    terms = frozenset(term for term in terms if term)
+    if not terms:
+        return True
+    database = _database(terms)
+
+    found: set[int] = set()
+
+    def on_match(pattern_id, start, end, flags, context):
+        found.add(pattern_id)
+        return len(found) == len(terms)  # halt the scan once all are found
+
+    # Compiled databases are shared between callers, but their scratch space
+    # may only be used by one scan at a time
+    scratch = hyperscan.Scratch(database)
+    try:
+        encoded = document.encode("utf-8", "surrogatepass")
+        database.scan(encoded, match_event_handler=on_match, scratch=scratch)
+    except hyperscan.ScanTerminated:
+        pass
+    return len(found) == len(terms)
+
+
+@lru_cache(maxsize=128)
+def _factor_oracle(terms: frozenset[str]) -> FactorOracle:
+    return FactorOracle(set(terms))
 
 
 def search_sbom(document: str, terms: set[str]) -> bool:
-    factor_oracle = FactorOracle(terms)
+    if hyperscan and len(terms) <= PACKED_MAX_TERMS:
+        if 0 < min(map(len, terms)) <= PACKED_MAX_PREFIX:
+            return search_hyperscan(document, terms)
+    if ahocorasick:
+        return search_ahocorasick(document, terms)
+
+    factor_oracle = _factor_oracle(frozenset(terms))
     return factor_oracle.search(document)
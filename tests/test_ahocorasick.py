@@ -0,0 +1,32 @@
+from unittest import TestCase, skipUnless
+
+import multi_string_search
+from multi_string_search import search_ahocorasick
+
+from tests.fixtures import (
+    DOCUMENT,
+    complete_subset_queries,
+    overlapping_set_queries,
+    disjoint_set_queries,
+)
+
+
+@skipUnless(multi_string_search.ahocorasick, "pyahocorasick is not installed")
+class TestAhoCorasickSearch(TestCase):
+
+    def test_complete_queries(self):
+        for terms in complete_subset_queries:
+            self.assertTrue(search_ahocorasick(DOCUMENT, terms))
+
+    def test_overlapping_queries(self):
+        for terms in overlapping_set_queries:
+            self.assertFalse(search_ahocorasick(DOCUMENT, terms))
+
+    def test_disjoint_queries(self):
+        for terms in disjoint_set_queries:
+            self.assertFalse(search_ahocorasick(DOCUMENT, terms))
+
+    def test_empty_term_queries(self):
+        self.assertTrue(search_ahocorasick(DOCUMENT, [""]))
+        self.assertTrue(search_ahocorasick(DOCUMENT, ["", "text"]))
+        self.assertFalse(search_ahocorasick(DOCUMENT, ["", "factor oracle"]))
@@ -1,6 +1,7 @@
 from unittest import TestCase
+from unittest.mock import patch
 
-from multi_string_search import FactorOracle, TrieNode, search_sbom
+from multi_string_search import FactorOracle, TrieNode, _scan, _scan_verify, search_sbom
 
 from tests.fixtures import (
     DOCUMENT,
@@ -19,17 +20,24 @@ class TestFactorOracleSearch(TestCase):
         expected_trie = TrieNode(
             children={
                 "c": TrieNode(children={
-                    "b": TrieNode(children={"a": TrieNode(terms={"abc", "aabc"})}),
+                    "b": TrieNode(children={"a": TrieNode(terms={"abc"})}),
                     "a": TrieNode(children={"b": TrieNode(terms={"bac"})}),
                 }),
                 "b": TrieNode(children={
-                    "a": TrieNode(children={"a": TrieNode(terms={"aab"})}),
+                    "a": TrieNode(children={"a": TrieNode(terms={"aab", "aabc"})}),
                 }),
             }
         )
 
         self.assertEqual(expected_trie, trie)
 
+    def test_trie_inequality(self):
+        trie = TrieNode.from_terms(("abc", "xbc"), 3)
+        other = TrieNode.from_terms(("abc", "ybc"), 3)
+
+        self.assertNotEqual(trie, other)
+        self.assertNotEqual(trie, "abc")
+
     def test_trie_traversal(self):
         terms = ("cba", "baa", "cbaa", "cab")
         trie = TrieNode.from_terms(terms, 4)
@@ -50,14 +58,151 @@ class TestFactorOracleSearch(TestCase):
 
         self.assertEqual(expected_traversal, traversal)
 
+    def test_graph_numbering(self):
+        terms = ("cba", "baa", "cbaa", "cab")
+        oracle = FactorOracle(terms)
+        paths = {}
+        for term in terms:
+            state, path = 0, []
+            for byte in reversed(term.encode("utf-8")[:oracle._prefix_length]):
+                state = oracle._graph[state][oracle._remap[byte]]
+                path.append(state)
+            paths[term] = path
+
+        # States are numbered depth-first, in order of reversed prefix, so
+        # that each newly-inserted path occupies consecutive states
+        expected_paths = {
+            "baa": [1, 2, 3],  # aab
+            "cba": [1, 4, 5],  # abc
+            "cbaa": [1, 4, 5],  # abc
+            "cab": [6, 7, 8],  # bac
+        }
+
+        self.assertEqual(expected_paths, paths)
+        self.assertEqual(9, len(oracle._graph))
+
+    def test_generated_scan(self):
+        queries = (
+            complete_subset_queries + overlapping_set_queries + disjoint_set_queries
+        )
+        for terms in queries:
+            oracle = FactorOracle(terms)
+            columns = DOCUMENT.encode("utf-8").translate(oracle._remap)
+            generated_scan = oracle._codegen_scan()
+            for position in range(len(columns)):
+                self.assertEqual(
+                    _scan(columns, position, oracle._prefix_length, *oracle._tables),
+                    generated_scan(columns, position),
+                )
+
+    def test_verified_scan(self):
+        queries = (
+            complete_subset_queries + overlapping_set_queries + disjoint_set_queries
+        )
+        for terms in queries:
+            oracle = FactorOracle(terms)
+            encoded = DOCUMENT.encode("utf-8")
+            columns = encoded.translate(oracle._remap)
+            found = bytearray(len(oracle._query_terms))
+            self.assertEqual(
+                oracle.search(DOCUMENT),
+                _scan_verify(
+                    columns, encoded, oracle._prefix_length,
+                    *oracle._tables, *oracle._verification, found,
+                ),
+            )
+
     def test_complete_queries(self):
         for terms in complete_subset_queries:
-            self.assertTrue(search_sbom(DOCUMENT, terms))
+            self.assertTrue(FactorOracle(terms).search(DOCUMENT))
+
+    def test_shared_factor_queries(self):
+        queries = (
+            ("bbabbabbbbbbbbaabbaababbababbaaabaabaaa", ["baaba", "bbbaa"]),
+            ("baababbabbaabbabbaaababaabbbbbb", ["abbaa", "aabab"]),
+        )
+        for document, terms in queries:
+            self.assertTrue(FactorOracle(terms).search(document))
+
+    def test_multibyte_queries(self):
+        queries = (
+            ("aéaaa", ["éaaa"]),
+            ("aéaaaa", ["éaa"]),
+            ("éaéaaa", ["éaé", "aéaa", "éaéa"]),
+            ("ééééaaaa", ["éaa", "ééééa"]),
+        )
+        for document, terms in queries:
+            self.assertTrue(FactorOracle(terms).search(document))
+
+    @patch("multi_string_search.njit", None)
+    def test_shared_prefix_queries(self):
+        queries = (
+            ("xxabcd abce", ["abc", "abcd", "abce"], True),
+            ("xxabcd", ["abce", "abcd"], False),
+            ("xxabc", ["abc", "abcd"], False),
+            ("xxabcd", ["abc"], True),
+        )
+        for document, terms, expected in queries:
+            self.assertEqual(FactorOracle(terms).search(document), expected)
+
+    @patch("multi_string_search.njit", None)
+    def test_sparse_alphabet_queries(self):
+        document = "." * 100 + "QUIZ!" + "." * 50 + "XYZ" + "."
+        self.assertTrue(FactorOracle(["QUIZ!", "XYZ"]).search(document))
+        self.assertTrue(FactorOracle(["XYZ."]).search(document))
+        self.assertFalse(FactorOracle(["QUIZ?", "XYZ"]).search(document))
+
+    @patch("multi_string_search.njit", None)
+    def test_tiled_document(self):
+        with patch("multi_string_search.TILE_LENGTH", 5):
+            for terms in complete_subset_queries:
+                self.assertTrue(FactorOracle(terms).search(DOCUMENT))
+            for terms in overlapping_set_queries + disjoint_set_queries:
+                self.assertFalse(FactorOracle(terms).search(DOCUMENT))
 
     def test_overlapping_queries(self):
         for terms in overlapping_set_queries:
-            self.assertFalse(search_sbom(DOCUMENT, terms))
+            self.assertFalse(FactorOracle(terms).search(DOCUMENT))
+
+    def test_encoded_document(self):
+        document = DOCUMENT.encode("utf-8")
+        for terms in complete_subset_queries:
+            self.assertTrue(FactorOracle(terms).search(document))
+        for terms in disjoint_set_queries:
+            self.assertFalse(FactorOracle(terms).search(document))
 
     def test_disjoint_queries(self):
         for terms in disjoint_set_queries:
-            self.assertFalse(search_sbom(DOCUMENT, terms))
+            self.assertFalse(FactorOracle(terms).search(DOCUMENT))
+
+    def test_search_sbom_dispatch(self):
+        with patch("multi_string_search.hyperscan", None):
+            with patch("multi_string_search.ahocorasick", None):
+                for terms in complete_subset_queries:
+                    self.assertTrue(search_sbom(DOCUMENT, terms))
+                for terms in overlapping_set_queries + disjoint_set_queries:
+                    self.assertFalse(search_sbom(DOCUMENT, terms))
+
+            with (
+                patch("multi_string_search.ahocorasick", True),
+                patch("multi_string_search.search_ahocorasick") as search_ahocorasick,
+            ):
+                search_sbom(DOCUMENT, ["text"])
+                search_ahocorasick.assert_called_once_with(DOCUMENT, ["text"])
+
+    def test_search_sbom_empty_terms(self):
+        for backends in ((None, None), (None, True), (True, None)):
+            with (
+                patch("multi_string_search.hyperscan", backends[0]),
+                patch("multi_string_search.ahocorasick", backends[1]),
+                patch("multi_string_search._automaton") as automaton,
+                patch("multi_string_search._database") as database,
+            ):
+                self.assertTrue(search_sbom("abc", [""]))
+                automaton.assert_not_called()
+                database.assert_not_called()
+
+        with patch("multi_string_search.hyperscan", None):
+            with patch("multi_string_search.ahocorasick", None):
+                self.assertTrue(search_sbom("abc", ["", "a"]))
+                self.assertFalse(search_sbom("abc", ["", "z"]))
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, skipUnless
+
+import multi_string_search
+from multi_string_search import search_hyperscan
+
+from tests.fixtures import (
+    DOCUMENT,
+    complete_subset_queries,
+    overlapping_set_queries,
+    disjoint_set_queries,
+)
+
+
+@skipUnless(multi_string_search.hyperscan, "hyperscan is not installed")
+class TestHyperscanSearch(TestCase):
+
+    def test_complete_queries(self):
+        for terms in complete_subset_queries:
+            self.assertTrue(search_hyperscan(DOCUMENT, terms))
+
+    def test_overlapping_queries(self):
+        for terms in overlapping_set_queries:
+            self.assertFalse(search_hyperscan(DOCUMENT, terms))
+
+    def test_disjoint_queries(self):
+        for terms in disjoint_set_queries:
+            self.assertFalse(search_hyperscan(DOCUMENT, terms))
+
+    def test_empty_term_queries(self):
+        self.assertTrue(search_hyperscan(DOCUMENT, [""]))
+        self.assertTrue(search_hyperscan(DOCUMENT, ["", "text"]))
+        self.assertFalse(search_hyperscan(DOCUMENT, ["", "factor oracle"]))
+
+    def test_surrogate_queries(self):
+        self.assertTrue(search_hyperscan("a\ud800b", ["a\ud800", "b"]))
+
+    def test_concurrent_queries(self):
+        terms = ["acegi", "zxvtr"]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda _: search_hyperscan(DOCUMENT, terms), range(64)
+            ))
+        self.assertEqual([False] * 64, results)